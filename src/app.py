@@ -1,28 +1,37 @@
 import atexit
 import logging
 import os
+import shutil
+import tempfile
+import time
 import uuid
-from datetime import datetime, timedelta
 from pathlib import Path
-from threading import Lock
+from threading import Event, Lock, Thread
 
+import numpy as np
 import pandas as pd
-from apscheduler.schedulers.background import BackgroundScheduler
 from flask import Flask, flash, redirect, render_template, request, send_file, url_for
 from werkzeug.utils import secure_filename
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no flock
+    fcntl = None
+
 try:
     from src.converters import (
+        classify_columns,
+        coerce_to_numeric,
+        convert_date_columns,
         convert_text_columns_to_numbers,
-        find_columns_with_keywords,
-        normalize_column_name,
     )
 except ModuleNotFoundError as exc:
     if exc.name == "src":
         from converters import (
+            classify_columns,
+            coerce_to_numeric,
+            convert_date_columns,
             convert_text_columns_to_numbers,
-            find_columns_with_keywords,
-            normalize_column_name,
         )
     else:
         raise
@@ -42,6 +51,19 @@ MAX_CONTENT_LENGTH_DEFAULT = 16 * 1024 * 1024  # 16MB max file size
 MAX_CONTENT_LENGTH = int(
     os.environ.get("MAX_CONTENT_LENGTH", str(MAX_CONTENT_LENGTH_DEFAULT))
 )
+UPLOAD_BUFFER_SIZE = 1024 * 1024  # 1MB copy chunks when saving uploads
+CLEANUP_INTERVAL_SECONDS = 10 * 60
+FILE_MAX_AGE_SECONDS = 30 * 60
+CLEANUP_LOCK_FILENAME = ".cleanup.lock"
+
+DATE_KEYWORDS = ("fecha", "liberacion", "liberación")
+# Compared against normalized (lowercase, accent-free) column names
+MONEY_COLUMN_TARGETS = (
+    "valor de la compra",
+    "comision mas iva",
+    "monto neto de operacion",
+    "impuestos cobrados por retenciones iibb",
+)
 
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 app.config["MAX_CONTENT_LENGTH"] = MAX_CONTENT_LENGTH
@@ -81,103 +103,170 @@ def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def check_signature(header):
+    """Check that ``header`` (a file's first bytes) is an Excel file signature."""
+    # Excel file signatures
+    # .xlsx files start with PK (ZIP format)
+    # .xls files start with specific OLE signatures
+    xlsx_signature = (
+        header.startswith(b"PK\x03\x04")
+        or header.startswith(b"PK\x05\x06")
+        or header.startswith(b"PK\x07\x08")
+    )
+    xls_signature = header.startswith(
+        b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+    )  # OLE2 signature
+
+    return xlsx_signature or xls_signature
+
+
 def is_valid_excel_file(file_path):
     """
-    Validate that the file is actually an Excel file by checking file signature (magic bytes)
-    and attempting to read it with pandas.
+    Validate the file size and Excel file signature of an upload.
+
+    Both checks use a single open file handle. Whether the workbook actually
+    parses is checked by the single ``read_workbook`` call in ``upload_file``.
     """
     try:
-        file_size = os.path.getsize(file_path)
-        if file_size == 0:
-            logger.warning(f"Empty file rejected: {file_path}")
-            return False
-
-        if file_size > MAX_CONTENT_LENGTH:
-            logger.warning(f"File too large rejected: {file_path} ({file_size} bytes)")
-            return False
-
-        # Check file signature (magic bytes)
         with open(file_path, "rb") as f:
-            header = f.read(8)
+            file_size = os.fstat(f.fileno()).st_size
+            if file_size == 0:
+                logger.warning(f"Empty file rejected: {file_path}")
+                return False
+
+            if file_size > MAX_CONTENT_LENGTH:
+                logger.warning(
+                    f"File too large rejected: {file_path} ({file_size} bytes)"
+                )
+                return False
 
-        # Excel file signatures
-        # .xlsx files start with PK (ZIP format)
-        # .xls files start with specific OLE signatures
-        xlsx_signature = (
-            header.startswith(b"PK\x03\x04")
-            or header.startswith(b"PK\x05\x06")
-            or header.startswith(b"PK\x07\x08")
-        )
-        xls_signature = header.startswith(
-            b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
-        )  # OLE2 signature
+            header = f.read(8)
+            if not check_signature(header):
+                logger.warning(
+                    f"Invalid file signature for {file_path}: {header.hex()}"
+                )
+                return False
 
-        if not (xlsx_signature or xls_signature):
-            logger.warning(f"Invalid file signature for {file_path}: {header.hex()}")
-            return False
+            return True
 
-        # Try to read with pandas as additional validation
-        # Use nrows=1 to minimize resource usage and prevent potential DoS
-        df = pd.read_excel(file_path, nrows=1)
+    except Exception as e:
+        logger.warning(f"File validation failed for {file_path}: {str(e)}")
+        return False
 
-        if df is None:
-            return False
 
-        return True
+def read_workbook(file_path):
+    """
+    Parse the first sheet with the calamine engine.
 
+    Legacy .xls files that calamine cannot read are retried with pandas'
+    default engine (xlrd).
+    """
+    try:
+        return pd.read_excel(file_path, engine="calamine")
     except Exception as e:
-        logger.warning(f"File validation failed for {file_path}: {str(e)}")
-        return False
+        if not file_path.lower().endswith(".xls"):
+            raise
+        logger.info("Calamine could not read %s (%s); retrying with xlrd", file_path, e)
+        return pd.read_excel(file_path)
 
 
 def cleanup_old_files():
-    """Remove files older than 1 hour from the temp directory."""
+    """Remove files older than 30 minutes from the temp directory."""
     try:
-        current_time = datetime.now()
-        for filename in os.listdir(UPLOAD_FOLDER):
-            file_path = os.path.join(UPLOAD_FOLDER, filename)
-            if os.path.isfile(file_path):
-                file_time = datetime.fromtimestamp(os.path.getctime(file_path))
-                if current_time - file_time > timedelta(minutes=30):
-                    os.remove(file_path)
-                    logger.info("Deleted old file: %s", filename)
+        current_time = time.time()
+        with os.scandir(UPLOAD_FOLDER) as entries:
+            for entry in entries:
+                if entry.name == CLEANUP_LOCK_FILENAME:
+                    continue
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                file_age = current_time - entry.stat(follow_symlinks=False).st_ctime
+                if file_age > FILE_MAX_AGE_SECONDS:
+                    os.unlink(entry.path)
+                    logger.info("Deleted old file: %s", entry.name)
     except Exception as e:
         logger.exception("Error during cleanup: %s", e)
 
 
+def _with_flock(lock_path, func):
+    """
+    Run ``func`` at most once per cleanup interval across all worker processes.
+
+    Holds an exclusive, non-blocking flock on ``lock_path`` while running and
+    stamps the lock file afterwards. Returns False without calling ``func`` when
+    another process (e.g. a sibling gunicorn worker) holds the lock or already
+    ran it less than ``CLEANUP_INTERVAL_SECONDS`` ago.
+    """
+    if fcntl is None:
+        func()
+        return True
+
+    with open(lock_path, "a") as lock_file:
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            logger.info("Cleanup already running in another worker, skipping")
+            return False
+        try:
+            # An empty lock file has never been stamped by a completed sweep
+            lock_stat = os.fstat(lock_file.fileno())
+            last_sweep_age = time.time() - lock_stat.st_mtime
+            if lock_stat.st_size > 0 and last_sweep_age < CLEANUP_INTERVAL_SECONDS:
+                logger.info("Cleanup already ran in another worker, skipping")
+                return False
+            func()
+            if lock_stat.st_size == 0:
+                lock_file.write("swept\n")
+                lock_file.flush()
+            os.utime(lock_file.fileno())
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    return True
+
+
 _scheduler_lock = Lock()
-_scheduler = None
+_cleanup_thread = None
+_cleanup_stop = Event()
 _scheduler_shutdown_registered = False
 
 
+def _cleanup_loop(stop_event):
+    while not stop_event.wait(CLEANUP_INTERVAL_SECONDS):
+        try:
+            _with_flock(
+                os.path.join(UPLOAD_FOLDER, CLEANUP_LOCK_FILENAME), cleanup_old_files
+            )
+        except Exception as e:
+            logger.exception("Error during scheduled cleanup: %s", e)
+
+
 def _shutdown_scheduler():
-    global _scheduler
+    global _cleanup_thread
     with _scheduler_lock:
-        if _scheduler and _scheduler.running:
+        if _cleanup_thread is not None:
             logger.info("Shutting down cleanup scheduler")
-            _scheduler.shutdown()
+            _cleanup_stop.set()
+            _cleanup_thread = None
 
 
 def start_cleanup_scheduler():
     """Ensure the cleanup scheduler starts only once per process."""
-    global _scheduler, _scheduler_shutdown_registered
+    global _cleanup_thread, _cleanup_stop, _scheduler_shutdown_registered
     with _scheduler_lock:
-        if _scheduler is None:
-            _scheduler = BackgroundScheduler()
-            _scheduler.add_job(
-                func=cleanup_old_files,
-                trigger="interval",
-                minutes=10,
-                id="cleanup-old-files",
-                replace_existing=True,
-            )
-        if not _scheduler.running:
+        if _cleanup_thread is None:
             logger.info("Starting cleanup scheduler")
-            _scheduler.start()
+            _cleanup_stop = Event()
+            _cleanup_thread = Thread(
+                target=_cleanup_loop,
+                args=(_cleanup_stop,),
+                name="cleanup-old-files",
+                daemon=True,
+            )
+            _cleanup_thread.start()
             if not _scheduler_shutdown_registered:
                 atexit.register(_shutdown_scheduler)
                 _scheduler_shutdown_registered = True
-    return _scheduler
+    return _cleanup_thread
 
 
 start_cleanup_scheduler()
@@ -207,14 +296,26 @@ def upload_file():
     if file and allowed_file(file.filename):
         try:
             original_filename = secure_filename(file.filename)
-            unique_id = str(uuid.uuid4())
-            upload_path = os.path.join(
-                app.config["UPLOAD_FOLDER"], f"{unique_id}_original_{original_filename}"
+            # The processed filename is the download token, so it needs a
+            # CSPRNG id; mkstemp only adds atomic, collision-free creation.
+            unique_id = uuid.uuid4().hex
+            fd, upload_path = tempfile.mkstemp(
+                prefix=f"{unique_id}_",
+                suffix=f"_original_{original_filename}",
+                dir=app.config["UPLOAD_FOLDER"],
             )
-            file.save(upload_path)
+            with os.fdopen(fd, "wb", buffering=UPLOAD_BUFFER_SIZE) as fh:
+                shutil.copyfileobj(file.stream, fh, length=UPLOAD_BUFFER_SIZE)
             logger.info("File uploaded: %s -> %s", original_filename, upload_path)
 
-            if not is_valid_excel_file(upload_path):
+            df = None
+            if is_valid_excel_file(upload_path):
+                try:
+                    df = read_workbook(upload_path)
+                except Exception as e:
+                    logger.warning("Failed to parse Excel file %s: %s", upload_path, e)
+
+            if df is None:
                 os.remove(upload_path)
                 flash(
                     "El archivo no es un archivo Excel válido. Por favor sube un archivo Excel real."
@@ -223,27 +324,21 @@ def upload_file():
                 return redirect(url_for("index"))
 
             logger.info("Starting processing of %s", upload_path)
-            df = pd.read_excel(upload_path)
             processed_df, converted_columns = convert_text_columns_to_numbers(df)
-            date_keywords = ["fecha", "liberacion", "liberación"]
-            date_cols = find_columns_with_keywords(processed_df.columns, date_keywords)
-
-            for col in date_cols:
-                processed_df[col] = pd.to_datetime(processed_df[col], errors="coerce")
-                # Remove timezone info if present (Excel does not support tz-aware datetimes)
-                if pd.api.types.is_datetime64_any_dtype(processed_df[col]):
-                    try:
-                        processed_df[col] = processed_df[col].dt.tz_localize(None)
-                    except (AttributeError, TypeError):
-                        pass
+            column_buckets = classify_columns(
+                processed_df.columns, DATE_KEYWORDS, MONEY_COLUMN_TARGETS
+            )
+            date_cols = [col for _, col in column_buckets["date"]]
+            processed_df = convert_date_columns(processed_df, date_cols)
 
             sum_h = sum_h_pos = sum_h_neg = None
             if processed_df.shape[1] > 7:
-                col_h = processed_df.iloc[:, 7]
-                col_h_numeric = pd.to_numeric(col_h, errors="coerce")
-                sum_h = col_h_numeric.sum(skipna=True)
-                sum_h_pos = col_h_numeric[col_h_numeric > 0].sum(skipna=True)
-                sum_h_neg = col_h_numeric[col_h_numeric < 0].sum(skipna=True)
+                col_h = coerce_to_numeric(processed_df.iloc[:, 7])
+                # Missing values count as 0, which leaves every sum unchanged
+                col_h_values = col_h.to_numpy(dtype="float64", na_value=0.0)
+                sum_h_pos = np.maximum(col_h_values, 0.0).sum()
+                sum_h_neg = np.minimum(col_h_values, 0.0).sum()
+                sum_h = sum_h_pos + sum_h_neg
 
             processed_filename = f"{unique_id}_processed_{original_filename}"
             processed_path = os.path.join(
@@ -270,39 +365,20 @@ def upload_file():
                     }
                 )
                 worksheet.set_row(0, 40)
-                # Set all columns to width 20
-                for col_idx in range(len(processed_df.columns)):
-                    worksheet.set_column(col_idx, col_idx, 20)
-                # Overwrite header row with header_format to ensure wrap
-                for col_idx, value in enumerate(processed_df.columns):
-                    worksheet.write(0, col_idx, value, header_format)
-
-                # Define normalized money columns
-                money_col_targets = [
-                    "valor de la compra",
-                    "comision mas iva",
-                    "comisión más iva",
-                    "monto neto de operacion",
-                    "monto neto de operación",
-                    "impuestos cobrados por retenciones iibb",
-                ]
-
-                # Set date columns
-                for col in date_cols:
-                    col_idx = processed_df.columns.get_loc(col)
-                    worksheet.set_column(col_idx, col_idx, 20, date_format)
-                # Set ID columns to integer format, wide enough to avoid scientific notation
-                for col in processed_df.columns:
-                    norm_col = normalize_column_name(col)
-                    if "id" in norm_col:
-                        col_idx = processed_df.columns.get_loc(col)
-                        worksheet.set_column(col_idx, col_idx, 15, id_format)
-                # Set money columns to currency format
-                for col in processed_df.columns:
-                    norm_col = normalize_column_name(col)
-                    if norm_col in money_col_targets:
-                        col_idx = processed_df.columns.get_loc(col)
-                        worksheet.set_column(col_idx, col_idx, 15, money_format)
+
+                # ID columns are kept narrow but wide enough to avoid scientific notation
+                column_formats = {
+                    "date": (20, date_format),
+                    "id": (15, id_format),
+                    "money": (15, money_format),
+                    "default": (20, None),
+                }
+                for kind, columns in column_buckets.items():
+                    width, cell_format = column_formats[kind]
+                    for col_idx, col in columns:
+                        worksheet.set_column(col_idx, col_idx, width, cell_format)
+                        # Overwrite header cell with header_format to ensure wrap
+                        worksheet.write(0, col_idx, col, header_format)
             logger.info("Processed file saved: %s", processed_path)
 
             os.remove(upload_path)
@@ -389,7 +465,10 @@ def download_file(filename):
 
         if resolved_path.is_file():
             logger.info("Serving file: %s", resolved_path)
-            download_name = f"convertido_{normalized_filename.split('_', 2)[-1]}"
+            # mkstemp adds its own random segment after the id, so split on the marker
+            download_name = (
+                f"convertido_{normalized_filename.split('_processed_', 1)[-1]}"
+            )
             return send_file(
                 resolved_path, as_attachment=True, download_name=download_name
             )
@@ -1,29 +1,61 @@
 """Utilities for normalizing and converting tabular data columns."""
 
 from __future__ import annotations
+import functools
 import math
+import re
 import unicodedata
-from typing import Iterable, List, Optional, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Pattern, Tuple
+import numpy as np
 import pandas as pd
 
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - object-backed strings still work, slower
+    pa = pc = None
+
 
 _ID_KEYWORDS: Tuple[str, ...] = ("id",)
 _CURRENCY_SYMBOLS: Tuple[str, ...] = ("$", "€", "£", "¥", "₽", "₱", "₹")
+# Currency symbols plus the separators (NBSP, space, apostrophe) dropped with them.
+_CURRENCY_TABLE = str.maketrans("", "", "".join(_CURRENCY_SYMBOLS) + "\xa0 '")
+# Arrow-backed strings run the .str pipeline in C; object storage is the fallback.
+_STRING_DTYPE = "string" if pa is None else "string[pyarrow]"
+# Series-level patterns are plain strings that both ``re`` and Arrow's RE2
+# understand (no lookarounds); compiled patterns would force the Python path.
+_STRIP_CHARS_PATTERN = "[" + re.escape("".join(_CURRENCY_SYMBOLS)) + "\xa0 ']"
+# Inferred kinds that pd.to_numeric can parse without turning booleans into 0/1.
+_PLAIN_NUMERIC_KINDS = frozenset(
+    {"string", "integer", "floating", "mixed-integer-float", "decimal"}
+)
+_PARENTHESES_PATTERN = r"^\(.*\)$"
+# Unambiguous spellings per convention; other rows take the generic separator logic.
+_US_NUMBER_PATTERN = r"(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d*)?"
+_EU_NUMBER_PATTERN = r"\d{1,3}(?:\.\d{3})+,\d+|\d+(?:,\d{1,2})?"
+# pandas' string-to-float parser segfaults when an exponent overflows a C int
+# (e.g. "1e2147483648"); such cells are parsed with float() instead.
+_LONG_EXPONENT_PATTERN = r"[eE][+-]?\d{5,}"
+_CONVENTION_SAMPLE_SIZE = 200
+_VALIDATION_SAMPLE_SIZE = 5000
+_FAST_PATH_SAMPLE_SIZE = 100
 
 
 def normalize_column_name(name: object) -> str:
     """Return a normalized, accent-free column identifier."""
     if not isinstance(name, str):
         return ""
+    return _normalize_text(name)
+
+
+@functools.lru_cache(maxsize=4096)
+def _normalize_text(name: str) -> str:
     normalized = unicodedata.normalize("NFKD", name.strip().lower())
     return "".join(char for char in normalized if not unicodedata.combining(char))
 
 
 def _strip_currency_symbols(value: str) -> str:
-    cleaned = value
-    for symbol in _CURRENCY_SYMBOLS:
-        cleaned = cleaned.replace(symbol, "")
-    return cleaned
+    return value.translate(_CURRENCY_TABLE)
 
 
 def _coerce_to_string(value: object) -> Optional[str]:
@@ -43,9 +75,7 @@ def _parse_numeric_text(text_value: object) -> Tuple[Optional[str], bool]:
     if text is None:
         return None, False
 
-    cleaned = unicodedata.normalize("NFKC", text)
-    cleaned = cleaned.replace("\xa0", "")
-    cleaned = _strip_currency_symbols(cleaned)
+    cleaned = _strip_currency_symbols(unicodedata.normalize("NFKC", text))
 
     is_negative = False
     if cleaned.startswith("(") and cleaned.endswith(")"):
@@ -63,8 +93,6 @@ def _parse_numeric_text(text_value: object) -> Tuple[Optional[str], bool]:
     if cleaned.startswith("+"):
         cleaned = cleaned[1:]
 
-    cleaned = cleaned.replace(" ", "")
-
     if "." in cleaned and "," in cleaned:
         last_dot = cleaned.rfind(".")
         last_comma = cleaned.rfind(",")
@@ -82,8 +110,6 @@ def _parse_numeric_text(text_value: object) -> Tuple[Optional[str], bool]:
         parts = cleaned.split(".")
         cleaned = "".join(parts[:-1]) + "." + parts[-1]
 
-    cleaned = cleaned.replace("'", "")
-
     try:
         float(cleaned)
     except (TypeError, ValueError):
@@ -120,6 +146,199 @@ def convert_numeric_text(text_value: object) -> Optional[float]:
     return -result if is_negative else result
 
 
+def _detect_decimal_convention(text: pd.Series) -> str:
+    """Return ``"us"``, ``"eu"`` or ``"mixed"`` from a sample of cleaned values."""
+    sample = text.dropna().head(_CONVENTION_SAMPLE_SIZE)
+    if sample.empty:
+        return "mixed"
+    if sample.str.fullmatch(_US_NUMBER_PATTERN).all():
+        return "us"
+    if sample.str.fullmatch(_EU_NUMBER_PATTERN).all():
+        return "eu"
+    return "mixed"
+
+
+def _transform_rows(
+    text: pd.Series, rows: pd.Series, transform: Callable[[pd.Series], pd.Series]
+) -> pd.Series:
+    """Apply ``transform`` to the selected rows only, leaving the rest untouched."""
+    if not rows.any():
+        return text
+    transformed = transform(text[rows])
+    if pc is None:
+        return text.mask(rows, transformed)
+    # Series.mask re-boxes every Arrow cell in Python; scatter in C instead.
+    replaced = pc.replace_with_mask(
+        _to_arrow(text), pa.array(rows.to_numpy(dtype=bool)), _to_arrow(transformed)
+    )
+    return _from_arrow(replaced, text)
+
+
+def _strip_first(text: pd.Series) -> pd.Series:
+    return text.str.slice(1)
+
+
+def _strip_last(text: pd.Series) -> pd.Series:
+    return text.str.slice(0, -1)
+
+
+def _strip_first_and_last(text: pd.Series) -> pd.Series:
+    return text.str.slice(1, -1)
+
+
+def _drop_commas(text: pd.Series) -> pd.Series:
+    return text.str.replace(",", "", regex=False)
+
+
+def _drop_dots(text: pd.Series) -> pd.Series:
+    return text.str.replace(".", "", regex=False)
+
+
+def _comma_to_dot(text: pd.Series) -> pd.Series:
+    return text.str.replace(",", ".", regex=False)
+
+
+def _european_to_plain(text: pd.Series) -> pd.Series:
+    return _comma_to_dot(_drop_dots(text))
+
+
+def _keep_last_dot(text: pd.Series) -> pd.Series:
+    head, _, tail = (text.str.rpartition(".")[part] for part in range(3))
+    return _drop_dots(head) + "." + tail
+
+
+def _normalize_separators(text: pd.Series) -> pd.Series:
+    """Resolve thousands/decimal separators row by row, like ``_parse_numeric_text``."""
+    last_dot = text.str.rfind(".")
+    last_comma = text.str.rfind(",")
+    has_both = (last_dot >= 0) & (last_comma >= 0)
+    european = (has_both & (last_comma > last_dot)).fillna(False)
+    decimal_comma = (
+        ~has_both & (text.str.count(",") == 1) & (text.str.len() - last_comma <= 3)
+    ).fillna(False)
+    text = _transform_rows(text, european, _drop_dots)
+    text = _transform_rows(text, european | decimal_comma, _comma_to_dot)
+    text = _drop_commas(text)
+    extra_dots = (text.str.count(r"\.") > 1).fillna(False)
+    return _transform_rows(text, extra_dots, _keep_last_dot)
+
+
+def _to_arrow(text: pd.Series) -> "pa.Array":
+    return pa.array(text.astype(_STRING_DTYPE).array)
+
+
+def _from_arrow(array: "pa.Array", like: pd.Series) -> pd.Series:
+    return pd.Series(pd.arrays.ArrowStringArray(array), index=like.index, name=like.name)
+
+
+def _normalize_nfkc(text: pd.Series) -> pd.Series:
+    if pc is None:
+        return text.str.normalize("NFKC")
+    # pandas has no Arrow kernel for str.normalize; call pyarrow's directly.
+    return _from_arrow(pc.utf8_normalize(_to_arrow(text), form="NFKC"), text)
+
+
+def _float_or_nan(value: object) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def coerce_to_numeric(series: pd.Series) -> pd.Series:
+    """``pd.to_numeric(series, errors="coerce")`` as float64, safe for any text.
+
+    Cells with a 5+ digit exponent never reach pandas' parser, which crashes on
+    exponents that overflow; they are parsed with ``float()`` (giving ±inf or 0).
+    """
+    long_exponent = (
+        series.astype(_STRING_DTYPE)
+        .str.contains(_LONG_EXPONENT_PATTERN)
+        .fillna(False)
+        .astype(bool)
+    )
+    if not long_exponent.any():
+        return pd.to_numeric(series, errors="coerce").astype("float64")
+
+    values = pd.to_numeric(series.mask(long_exponent), errors="coerce")
+    values = values.astype("float64")
+    return values.mask(long_exponent, series[long_exponent].map(_float_or_nan))
+
+
+def _parse_numeric_series(series: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """Vectorized counterpart of :func:`convert_numeric_text`.
+
+    Returns ``(values, blank)``: the parsed floats (NaN where a cell is not
+    numeric-like) and a mask of cells that are null or empty after stripping.
+    Conditional steps only touch the rows they apply to, so signs and
+    separators cost nothing on cells that do not use them.
+    """
+    text = _normalize_nfkc(series.astype(_STRING_DTYPE)).str.strip()
+    blank = (text.isna() | (text == "")).astype(bool)
+    text = text.str.replace(_STRIP_CHARS_PATTERN, "", regex=True)
+
+    in_parentheses = text.str.match(_PARENTHESES_PATTERN).fillna(False)
+    text = _transform_rows(text, in_parentheses, _strip_first_and_last)
+    trailing_minus = text.str.endswith("-").fillna(False)
+    text = _transform_rows(text, trailing_minus, _strip_last)
+    leading_minus = text.str.startswith("-").fillna(False)
+    text = _transform_rows(text, leading_minus, _strip_first)
+    leading_plus = text.str.startswith("+").fillna(False)
+    text = _transform_rows(text, leading_plus, _strip_first)
+    is_negative = (in_parentheses | trailing_minus | leading_minus).astype(bool)
+
+    convention = _detect_decimal_convention(text)
+    if convention == "mixed":
+        text = _normalize_separators(text)
+    else:
+        if convention == "us":
+            matches = text.str.fullmatch(_US_NUMBER_PATTERN).fillna(False)
+            text = _transform_rows(text, matches, _drop_commas)
+        else:
+            matches = text.str.fullmatch(_EU_NUMBER_PATTERN).fillna(False)
+            text = _transform_rows(text, matches, _european_to_plain)
+        text = _transform_rows(text, ~matches, _normalize_separators)
+
+    values = coerce_to_numeric(text)
+    return values.mask(is_negative, -values), blank
+
+
+def _sample_is_numeric_like(values: np.ndarray) -> bool:
+    """Early exit for text columns: False at the first sampled non-numeric value."""
+    for value in values[:_VALIDATION_SAMPLE_SIZE]:
+        if _coerce_to_string(value) is not None and not is_numeric_like(value):
+            return False
+    return True
+
+
+def _parse_distinct_values(series: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """Run :func:`_parse_numeric_series` once per distinct value of ``series``.
+
+    Values are factorized on their string form so ``True`` and ``1`` stay apart.
+    """
+    codes, uniques = pd.factorize(series.astype(_STRING_DTYPE))
+    parsed, blank = _parse_numeric_series(pd.Series(uniques, dtype=_STRING_DTYPE))
+    # Code -1 marks missing values: append a NaN/blank slot for them.
+    values = np.append(parsed.to_numpy(), np.nan)[codes]
+    is_blank = np.append(blank.to_numpy(), True)[codes]
+    return (
+        pd.Series(values, index=series.index, dtype="float64"),
+        pd.Series(is_blank, index=series.index, dtype=bool),
+    )
+
+
+def _suits_plain_to_numeric(series: pd.Series) -> bool:
+    """Whether a bare ``pd.to_numeric`` is worth trying on the whole column.
+
+    Formatted columns (currency, EU separators) would fail on every cell, so a
+    leading sample that does not parse sends them straight to the text parser.
+    """
+    if pd.api.types.infer_dtype(series, skipna=True) not in _PLAIN_NUMERIC_KINDS:
+        return False
+    sample = series.dropna().head(_FAST_PATH_SAMPLE_SIZE)
+    return bool(coerce_to_numeric(sample).notna().all())
+
+
 def _should_force_numeric(norm_column_name: str) -> bool:
     return any(keyword in norm_column_name for keyword in _ID_KEYWORDS)
 
@@ -128,6 +347,7 @@ def convert_text_columns_to_numbers(df: pd.DataFrame) -> Tuple[pd.DataFrame, Lis
     """Convert numeric-like object columns in ``df`` into numeric dtypes."""
     converted_columns: List[str] = []
 
+    candidates: List[Tuple[str, bool]] = []
     for column in df.columns:
         series = df[column]
         if pd.api.types.is_numeric_dtype(series):
@@ -143,34 +363,112 @@ def convert_text_columns_to_numbers(df: pd.DataFrame) -> Tuple[pd.DataFrame, Lis
         ):
             continue
 
-        non_null = series.dropna()
-        if non_null.empty and not force_numeric:
+        if series.isna().all() and not force_numeric:
             continue
 
-        cleaned_non_null = non_null.map(_coerce_to_string).dropna()
-        if cleaned_non_null.empty and not force_numeric:
+        candidates.append((column, force_numeric))
+
+    # Clean workbooks are fully handled by one batched pd.to_numeric; only the
+    # cells it leaves unparsed go through the currency-aware parser.
+    plain_columns = [
+        column for column, _ in candidates if _suits_plain_to_numeric(df[column])
+    ]
+    plain_values = df[plain_columns].apply(coerce_to_numeric) if plain_columns else None
+
+    for column, force_numeric in candidates:
+        series = df[column]
+        if plain_values is not None and column in plain_values.columns:
+            values = plain_values[column]
+        else:
+            values = pd.Series(np.nan, index=series.index, dtype="float64")
+
+        unparsed = values.isna() & series.notna()
+        if unparsed.any():
+            leftovers = series[unparsed]
+            if not (
+                force_numeric
+                or _sample_is_numeric_like(leftovers.to_numpy(dtype=object))
+            ):
+                continue
+            parsed, blank = _parse_distinct_values(leftovers)
+            if not (force_numeric or (parsed.notna() | blank).all()):
+                continue
+            values = values.mask(unparsed, parsed)
+
+        if values.isna().all() and not force_numeric:
             continue
 
-        if force_numeric or cleaned_non_null.map(is_numeric_like).all():
-            numeric_series = series.map(convert_numeric_text)
-            df[column] = pd.to_numeric(numeric_series, errors="coerce")
-            converted_columns.append(column)
+        df[column] = values
+        converted_columns.append(column)
 
     return df, converted_columns
 
 
+def _to_naive_datetime(series: pd.Series) -> pd.Series:
+    converted = pd.to_datetime(series, errors="coerce")
+    # Excel does not support tz-aware datetimes; keep the local wall-clock time.
+    if isinstance(converted.dtype, pd.DatetimeTZDtype):
+        converted = converted.dt.tz_localize(None)
+    return converted
+
+
+def convert_date_columns(df: pd.DataFrame, columns: Iterable[str]) -> pd.DataFrame:
+    """Parse ``columns`` of ``df`` as timezone-naive datetimes in one assignment."""
+    columns = list(columns)
+    if columns:
+        converted = {column: _to_naive_datetime(df[column]) for column in columns}
+        df[columns] = pd.DataFrame(converted, index=df.index)
+    return df
+
+
+def _keyword_pattern(keywords: Iterable[str]) -> Optional[Pattern[str]]:
+    """Compile normalized ``keywords`` into one alternation; None if all are empty."""
+    normalized = {normalize_column_name(keyword) for keyword in keywords} - {""}
+    if not normalized:
+        return None
+    return re.compile("|".join(re.escape(keyword) for keyword in sorted(normalized)))
+
+
 def find_columns_with_keywords(
     columns: Iterable[str], keywords: Iterable[str]
 ) -> List[str]:
     """Return columns whose normalized name contains any of the provided keywords."""
-    normalized_keywords = tuple(normalize_column_name(keyword) for keyword in keywords)
-    matches: List[str] = []
-
-    for column in columns:
+    pattern = _keyword_pattern(keywords)
+    if pattern is None:
+        return []
+
+    return [
+        column for column in columns if pattern.search(normalize_column_name(column))
+    ]
+
+
+def classify_columns(
+    columns: Iterable[str], date_keywords: Iterable[str], money_columns: Iterable[str]
+) -> Dict[str, List[Tuple[int, str]]]:
+    """Bucket ``(position, column)`` pairs as date, id, money or default in one pass.
+
+    Date keywords take precedence over ID detection, which takes precedence over
+    exact money column names.
+    """
+    date_pattern = _keyword_pattern(date_keywords)
+    money_names = {normalize_column_name(name) for name in money_columns}
+    buckets: Dict[str, List[Tuple[int, str]]] = {
+        "date": [],
+        "id": [],
+        "money": [],
+        "default": [],
+    }
+
+    for position, column in enumerate(columns):
         normalized_column = normalize_column_name(column)
-        if any(
-            keyword and keyword in normalized_column for keyword in normalized_keywords
-        ):
-            matches.append(column)
+        if date_pattern is not None and date_pattern.search(normalized_column):
+            kind = "date"
+        elif _should_force_numeric(normalized_column):
+            kind = "id"
+        elif normalized_column in money_names:
+            kind = "money"
+        else:
+            kind = "default"
+        buckets[kind].append((position, column))
 
-    return matches
+    return buckets
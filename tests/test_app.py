@@ -11,3 +11,42 @@ def test_index(client):
     response = client.get('/')
     assert response.status_code == 200
     assert b"ML Converter" in response.data or b"Subir Archivo" in response.data
+
+def test_cleanup_old_files_removes_expired_files_only(tmp_path, monkeypatch):
+    from src import app as app_module
+    monkeypatch.setattr(app_module, 'UPLOAD_FOLDER', str(tmp_path))
+    monkeypatch.setattr(app_module, 'FILE_MAX_AGE_SECONDS', -1)
+    (tmp_path / 'old_processed_test.xlsx').write_bytes(b'data')
+    (tmp_path / 'subdir').mkdir()
+
+    app_module.cleanup_old_files()
+
+    assert not (tmp_path / 'old_processed_test.xlsx').exists()
+    assert (tmp_path / 'subdir').is_dir()
+
+def test_with_flock_skips_when_another_worker_holds_the_lock(tmp_path):
+    fcntl = pytest.importorskip('fcntl')
+    from src import app as app_module
+    lock_path = tmp_path / '.cleanup.lock'
+    calls = []
+
+    with open(lock_path, 'a') as held:
+        fcntl.flock(held.fileno(), fcntl.LOCK_EX)
+        assert app_module._with_flock(str(lock_path), lambda: calls.append(1)) is False
+
+    assert app_module._with_flock(str(lock_path), lambda: calls.append(1)) is True
+    assert calls == [1]
+
+def test_with_flock_sweeps_once_per_interval_across_workers(tmp_path, monkeypatch):
+    pytest.importorskip('fcntl')
+    from src import app as app_module
+    lock_path = str(tmp_path / '.cleanup.lock')
+    calls = []
+
+    assert app_module._with_flock(lock_path, lambda: calls.append(1)) is True
+    assert app_module._with_flock(lock_path, lambda: calls.append(2)) is False
+    assert calls == [1]
+
+    monkeypatch.setattr(app_module, 'CLEANUP_INTERVAL_SECONDS', 0)
+    assert app_module._with_flock(lock_path, lambda: calls.append(3)) is True
+    assert calls == [1, 3]
@@ -48,3 +48,105 @@ def test_mixed_content_column_is_not_converted():
 
 def test_convert_numeric_text_returns_na_for_invalid_strings():
     assert pd.isna(converters.convert_numeric_text('no es numero'))
+
+
+def test_column_conversion_matches_scalar_parser():
+    values = ['1.234,56', '1,234.56', '1,5', '1,234', '(12)', '7-', '+3', ' 000123 ', None]
+    df = pd.DataFrame({'monto': values})
+
+    processed, converted = converters.convert_text_columns_to_numbers(df)
+
+    assert 'monto' in converted
+    for raw, parsed in zip(values, processed['monto']):
+        expected = converters.convert_numeric_text(raw)
+        if pd.isna(expected):
+            assert pd.isna(parsed)
+        else:
+            assert parsed == pytest.approx(expected)
+
+
+def test_separator_convention_fast_path_keeps_ambiguous_values_exact():
+    values = ['1.234,56', '12,5', '3.000,00'] * 100 + ['1.234', '1,234', '(7,5)']
+    df = pd.DataFrame({'monto': values})
+
+    processed, converted = converters.convert_text_columns_to_numbers(df)
+
+    assert 'monto' in converted
+    expected = [converters.convert_numeric_text(value) for value in values]
+    assert processed['monto'].tolist() == pytest.approx(expected)
+
+
+def test_convert_date_columns_strips_timezone_keeping_wall_time():
+    df = pd.DataFrame(
+        {
+            'Fecha': ['2024-01-02T22:30:00-03:00', '2024-01-03T08:00:00-03:00', None],
+            'otro': ['a', 'b', 'c'],
+        }
+    )
+
+    processed = converters.convert_date_columns(df, ['Fecha'])
+
+    assert processed['Fecha'].dtype == 'datetime64[ns]'
+    assert processed['Fecha'].iloc[0] == pd.Timestamp('2024-01-02 22:30:00')
+    assert pd.isna(processed['Fecha'].iloc[2])
+    assert processed['otro'].tolist() == ['a', 'b', 'c']
+
+
+def test_booleans_are_not_mistaken_for_repeated_numbers():
+    df = pd.DataFrame({'monto': pd.Series([1, True, '2', 1], dtype=object)})
+
+    processed, converted = converters.convert_text_columns_to_numbers(df)
+
+    assert 'monto' not in converted
+    assert processed['monto'].tolist() == [1, True, '2', 1]
+
+
+def test_find_columns_with_keywords_ignores_case_and_accents():
+    columns = ['Fecha de Liberación', 'FECHA', 'Monto', 42, 'liberacion parcial']
+
+    matches = converters.find_columns_with_keywords(columns, ['fecha', 'liberación'])
+
+    assert matches == ['Fecha de Liberación', 'FECHA', 'liberacion parcial']
+    assert converters.find_columns_with_keywords(columns, ['', '  ']) == []
+
+
+def test_classify_columns_buckets_each_column_once():
+    columns = ['Fecha de Liberación', 'Operacion ID', 'Comisión más IVA', 'descripcion']
+
+    buckets = converters.classify_columns(columns, ['fecha'], ['comision mas iva'])
+
+    assert buckets == {
+        'date': [(0, 'Fecha de Liberación')],
+        'id': [(1, 'Operacion ID')],
+        'money': [(2, 'Comisión más IVA')],
+        'default': [(3, 'descripcion')],
+    }
+
+
+def test_overflowing_exponents_do_not_reach_pandas_parser():
+    df = pd.DataFrame({'monto': ['$1e2147483648', '(1e999999999999)', '$ 1,5']})
+
+    processed, converted = converters.convert_text_columns_to_numbers(df)
+
+    assert 'monto' in converted
+    assert processed['monto'].tolist() == [float('inf'), float('-inf'), 1.5]
+
+
+def test_overflowing_exponent_in_text_column_is_left_alone():
+    df = pd.DataFrame({'descripcion': ['hola', '1e2147483648', 'x']})
+
+    processed, converted = converters.convert_text_columns_to_numbers(df)
+
+    assert converted == []
+    assert processed['descripcion'].tolist() == ['hola', '1e2147483648', 'x']
+
+
+def test_overflowing_exponent_past_the_fast_path_sample():
+    values = [str(number) for number in range(150)] + ['1e2147483648']
+    df = pd.DataFrame({'cantidad': values})
+
+    processed, converted = converters.convert_text_columns_to_numbers(df)
+
+    assert converted == ['cantidad']
+    assert processed['cantidad'].iloc[-1] == float('inf')
+    assert processed['cantidad'].iloc[149] == 149.0
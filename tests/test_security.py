@@ -1,3 +1,6 @@
+import io
+import pandas as pd
+
 from src import app as app_module
 
 
@@ -6,9 +9,38 @@ def test_rejects_invalid_signature(tmp_path):
     bogus_excel = tmp_path / "malicious.xlsx"
     bogus_excel.write_text("not really an excel file", encoding="utf-8")
 
+    assert app_module.check_signature(bogus_excel.read_bytes()[:8]) is False
     assert app_module.is_valid_excel_file(str(bogus_excel)) is False
 
 
+def test_accepts_zip_and_ole2_signatures(tmp_path):
+    """Signature checks only look at the magic bytes."""
+    xlsx_like = tmp_path / "book.xlsx"
+    xlsx_like.write_bytes(b"PK\x03\x04" + b"\x00" * 8)
+    xls_like = tmp_path / "book.xls"
+    xls_like.write_bytes(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" + b"\x00" * 8)
+
+    assert app_module.check_signature(xlsx_like.read_bytes()[:8]) is True
+    assert app_module.check_signature(xls_like.read_bytes()[:8]) is True
+    assert app_module.is_valid_excel_file(str(xlsx_like)) is True
+    assert app_module.is_valid_excel_file(str(xls_like)) is True
+
+
+def test_upload_rejects_unparseable_workbook_with_valid_signature():
+    """A ZIP header alone is not enough: the workbook must parse."""
+    app_module.app.config["TESTING"] = True
+    with app_module.app.test_client() as client:
+        response = client.post(
+            "/upload",
+            data={"file": (io.BytesIO(b"PK\x03\x04" + b"garbage" * 8), "fake.xlsx")},
+            content_type="multipart/form-data",
+            follow_redirects=True,
+        )
+
+    assert response.status_code == 200
+    assert "no es un archivo Excel válido".encode() in response.data
+
+
 def test_rejects_empty_file(tmp_path):
     """Empty uploads fail validation."""
     empty_excel = tmp_path / "empty.xlsx"
@@ -29,3 +61,12 @@ def test_rejects_oversized_file(tmp_path, monkeypatch):
     )  # Valid ZIP header repeated; file > limit
 
     assert app_module.is_valid_excel_file(str(large_excel)) is False
+
+
+def test_accepts_real_workbook_without_parsing_it(tmp_path):
+    """Size and signature are enough; parsing happens once in upload_file."""
+    workbook = tmp_path / "real.xlsx"
+    pd.DataFrame({"a": [1]}).to_excel(workbook, index=False)
+
+    assert app_module.is_valid_excel_file(str(workbook)) is True
+    assert app_module.is_valid_excel_file(str(tmp_path / "missing.xlsx")) is False
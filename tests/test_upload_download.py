@@ -1,5 +1,6 @@
 import io
 import os
+import re
 import pandas as pd
 import pytest
 from src.app import app
@@ -58,3 +59,50 @@ def test_download_rejects_symlink_escape(client, tmp_path, monkeypatch):
     response = client.get("/download/escape", follow_redirects=False)
     # Should redirect back to index instead of serving the symlink target
     assert response.status_code == 302
+
+def test_upload_reports_column_h_totals(client):
+    df = pd.DataFrame({f'col{i}': ['x', 'y', 'z', 'w'] for i in range(7)})
+    df['importe'] = ['10', '(4)', None, '2,5']
+    excel_file = io.BytesIO()
+    df.to_excel(excel_file, index=False)
+    excel_file.seek(0)
+
+    response = client.post('/upload', data={
+        'file': (excel_file, 'totales.xlsx')
+    }, content_type='multipart/form-data', follow_redirects=True)
+    assert response.status_code == 200
+    assert b"$ 8.50" in response.data
+    assert b"$ 12.50" in response.data
+    assert b"$ -4.00" in response.data
+
+def test_column_h_totals_survive_overflowing_exponents(client):
+    df = pd.DataFrame({f'col{i}': ['x', 'y', 'z'] for i in range(7)})
+    df['notas'] = ['hola', '1e2147483648', 'x']
+    excel_file = io.BytesIO()
+    df.to_excel(excel_file, index=False)
+    excel_file.seek(0)
+
+    response = client.post('/upload', data={
+        'file': (excel_file, 'exponentes.xlsx')
+    }, content_type='multipart/form-data', follow_redirects=True)
+    assert response.status_code == 200
+
+def test_processed_file_downloads_under_original_name(client):
+    df = pd.DataFrame({'words': ['one', 'two']})
+    excel_file = io.BytesIO()
+    df.to_excel(excel_file, index=False)
+    excel_file.seek(0)
+
+    response = client.post('/upload', data={
+        'file': (excel_file, 'mi_resumen.xlsx')
+    }, content_type='multipart/form-data')
+    assert response.status_code == 200
+    match = re.search(rb'/download/([^"]+)', response.data)
+    assert match is not None
+
+    processed_name = match.group(1).decode()
+    assert re.fullmatch(r'[0-9a-f]{32}_processed_mi_resumen\.xlsx', processed_name)
+
+    with client.get(f"/download/{processed_name}") as download:
+        assert download.status_code == 200
+        assert "convertido_mi_resumen.xlsx" in download.headers.get('Content-Disposition', '')